@@ -1,5 +1,7 @@
 from injector import singleton, inject
 
+FILE_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+
 @singleton
 class DisplayController:
     """Controller for display-related utilities"""
@@ -18,8 +20,6 @@ class DisplayController:
         Returns:
             Formatted string with appropriate unit (B, KB, MB, GB, TB)
         """
-        for unit in ['B', 'KB', 'MB', 'GB']:
-            if size < 1024:
-                return f"{size:.2f} {unit}"
-            size /= 1024
-        return f"{size:.2f} TB" 
\ No newline at end of file
+        # Each unit is 2^10 times the previous one, so the unit index follows from the bit length
+        unit_index = min(max(int(size).bit_length() - 1, 0) // 10, len(FILE_SIZE_UNITS) - 1)
+        return f"{size / 1024 ** unit_index:.2f} {FILE_SIZE_UNITS[unit_index]}" 
\ No newline at end of file
@@ -1,17 +1,49 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import redirect_stdout
 from io import StringIO
+import hashlib
 import json
+import os
 import cv2
 import numpy as np
 import insightface
+import onnxruntime
 from insightface.app import FaceAnalysis
+from insightface.app.common import Face
+from insightface.utils import face_align
 from dataclasses import dataclass
-from typing import List, Tuple, Optional
+from typing import Callable, Hashable, List, Tuple, Optional, Sequence, Union
 from PIL import Image
 from enum import Enum
 import time
 from injector import singleton, inject
 
+# ONNX Runtime execution providers in order of preference
+PREFERRED_PROVIDERS = [
+    'CUDAExecutionProvider',
+    'DmlExecutionProvider',
+    'CoreMLExecutionProvider',
+    'CPUExecutionProvider',
+]
+
+# Shared pool for detecting faces in several images at once
+_detection_pool = ThreadPoolExecutor(max_workers=2)
+
+# Number of images whose detected faces and embeddings are remembered by cache key
+FACE_CACHE_SIZE = 16
+
+# Directory in the app folder where detected faces and embeddings are kept across runs, one .npz file per
+# cache key; the least recently used files beyond the count limit and files unused for too long are removed
+FACE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'cache', 'faces')
+FACE_CACHE_MAX_FILES = 500
+FACE_CACHE_MAX_AGE = 30 * 24 * 60 * 60  # seconds
+
+# Face analysis model pack and detection settings; part of the disk cache key, as they change the results
+FACE_MODEL_NAME = 'buffalo_l'
+DETECTION_SIZE = (640, 640)
+DETECTION_THRESHOLD = 0.3
+
 @dataclass
 class FaceMatchResult:
     similarity_score: float
@@ -26,70 +58,263 @@ class FaceMatchResult:
 class FaceController:
     @inject
     def __init__(self):
+        # Faces (with embeddings) of recently compared images, least recently used first
+        self._faces_cache = OrderedDict()
+
+        # Use the fastest execution provider available, falling back to CPU
+        available_providers = onnxruntime.get_available_providers()
+        providers = [
+            provider for provider in PREFERRED_PROVIDERS
+            if provider in available_providers
+        ]
+
         # Initialize face analysis with more lenient detection for artwork
         self.app = FaceAnalysis(
-            name='buffalo_l',  # or 'buffalo_l', 'buffalo_m', etc.
+            name=FACE_MODEL_NAME,  # or 'buffalo_l', 'buffalo_m', etc.
             root='.',  # Model download path
-            providers=['CPUExecutionProvider'],
+            providers=providers,
             allowed_modules=['detection', 'recognition', 'landmark_2d_106']
         )
         # Configure with larger detection size and lower threshold for illustrations
-        self.app.prepare(ctx_id=0, det_size=(640, 640), det_thresh=0.3)
+        self.app.prepare(ctx_id=0, det_size=DETECTION_SIZE, det_thresh=DETECTION_THRESHOLD)
 
-    def _process_image(self, image_path: str) -> Tuple[Optional[np.ndarray], Optional[List]]:
-        """Process an image and detect faces"""
+        # Warm up the detection and recognition sessions so the first comparison is not slowed down
+        self.app.det_model.detect(np.zeros((*DETECTION_SIZE, 3), dtype=np.uint8), max_num=0, metric='default')
+        recognition_model = self.app.models['recognition']
+        recognition_model.get_feat([np.zeros((*recognition_model.input_size, 3), dtype=np.uint8)])
+
+    def _detect_faces(self, image: Union[str, np.ndarray]) -> Tuple[Optional[np.ndarray], Optional[List]]:
+        """Load an image (path or decoded BGR array) and detect faces and landmarks, leaving recognition to the caller"""
         try:
-            # Use cv2.imdecode with np.fromfile to handle Unicode paths
-            img_array = np.fromfile(image_path, dtype=np.uint8)
-            img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
-            if img is None:
-                raise ValueError(f"Could not load image: {image_path}")
+            if isinstance(image, str):
+                # Use cv2.imdecode with np.fromfile to handle Unicode paths
+                img_array = np.fromfile(image, dtype=np.uint8)
+                img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+                if img is None:
+                    raise ValueError(f"Could not load image: {image}")
+            else:
+                img = image
             
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-            faces = self.app.get(img)
+            # InsightFace models take frames in OpenCV's BGR order, so no color conversion is needed
+            bboxes, kpss = self.app.det_model.detect(img, max_num=0, metric='default')
             
-            if not faces:
-                return None, None
+            # Return the decoded image even without faces; (None, None) means the image could not be processed
+            if bboxes.shape[0] == 0:
+                return img, None
+
+            faces = []
+            for i in range(bboxes.shape[0]):
+                kps = kpss[i] if kpss is not None else None
+                face = Face(bbox=bboxes[i, 0:4], kps=kps, det_score=bboxes[i, 4])
+                for taskname, model in self.app.models.items():
+                    if taskname in ('detection', 'recognition'):
+                        continue
+                    model.get(img, face)
+                faces.append(face)
 
             return img, faces
             
         except Exception as e:
-            print(f"Error processing image {image_path}: {str(e)}")
+            image_name = image if isinstance(image, str) else "in memory"
+            print(f"Error processing image {image_name}: {str(e)}")
             return None, None
 
+    def _process_images(self, images: List[Union[str, np.ndarray]]) -> List[Tuple[Optional[np.ndarray], Optional[List]]]:
+        """Process several images (paths or decoded BGR arrays), computing the embeddings of all their faces in one batch"""
+        # Decoding and ONNX Runtime inference release the GIL, so images are detected concurrently
+        results = list(_detection_pool.map(self._detect_faces, images))
+
+        # Align every detected face and run the recognition model once for all of them
+        recognition_model = self.app.models['recognition']
+        pending_faces = []
+        aligned_faces = []
+        for img, faces in results:
+            for face in faces or []:
+                pending_faces.append(face)
+                aligned_faces.append(face_align.norm_crop(
+                    img, landmark=face.kps, image_size=recognition_model.input_size[0]
+                ))
+
+        if aligned_faces:
+            embeddings = recognition_model.get_feat(aligned_faces)
+            for face, embedding in zip(pending_faces, embeddings):
+                face.embedding = embedding
+
+        return results
+
+    def _get_faces(
+        self,
+        images: Sequence[Union[str, np.ndarray, Callable[[], np.ndarray]]],
+        cache_keys: Optional[Sequence[Optional[Hashable]]] = None,
+        persist: Optional[Sequence[bool]] = None
+    ) -> List[Optional[List]]:
+        """
+        Get the faces of several images, only detecting and embedding those not cached under their key
+        
+        Args:
+            images: Image file paths, decoded BGR arrays, or functions returning one; functions are only
+                called for images not found in the cache
+            cache_keys: Key identifying the content of each image, or None to not cache it
+            persist: Whether each image may also be cached on disk (e.g. not for temporary files);
+                defaults to True for every image with a key
+        """
+        if cache_keys is None:
+            cache_keys = [None] * len(images)
+        if persist is None:
+            persist = [True] * len(images)
+
+        faces_list = [None] * len(images)
+        missing = []
+        for i, key in enumerate(cache_keys):
+            if key is None:
+                missing.append(i)
+            elif key in self._faces_cache:
+                self._faces_cache.move_to_end(key)
+                faces_list[i] = self._faces_cache[key]
+            else:
+                found, faces = self._load_cached_faces(key) if persist[i] else (False, None)
+                if found:
+                    self._remember_faces(key, faces)
+                    faces_list[i] = faces
+                else:
+                    missing.append(i)
+
+        if missing:
+            results = self._process_images([images[i]() if callable(images[i]) else images[i] for i in missing])
+            for i, (img, faces) in zip(missing, results):
+                faces_list[i] = faces
+                # Only remember real results, not images that failed to load
+                key = cache_keys[i]
+                if key is not None and img is not None:
+                    self._remember_faces(key, faces)
+                    if persist[i]:
+                        self._save_cached_faces(key, faces)
+
+        return faces_list
+
+    def _remember_faces(self, key: Hashable, faces: Optional[List]):
+        """Keep the faces of an image in the in-memory cache, dropping the least recently used"""
+        self._faces_cache[key] = faces
+        self._faces_cache.move_to_end(key)
+        if len(self._faces_cache) > FACE_CACHE_SIZE:
+            self._faces_cache.popitem(last=False)
+
+    def _cached_faces_path(self, key: Hashable) -> str:
+        """Get the file in the face cache directory for a cache key and the current model settings"""
+        cache_id = repr((FACE_MODEL_NAME, DETECTION_SIZE, DETECTION_THRESHOLD, key))
+        return os.path.join(FACE_CACHE_DIR, hashlib.sha1(cache_id.encode('utf-8')).hexdigest() + '.npz')
+
+    def _prune_cached_faces(self):
+        """Remove cache files unused for longer than the maximum age, then the least recently used beyond the limit"""
+        entries = []
+        for entry in os.scandir(FACE_CACHE_DIR):
+            if entry.is_file() and entry.name.endswith('.npz'):
+                entries.append((entry.stat().st_mtime, entry.path))
+        entries.sort(reverse=True)
+
+        oldest_allowed = time.time() - FACE_CACHE_MAX_AGE
+        for i, (mtime, path) in enumerate(entries):
+            if i >= FACE_CACHE_MAX_FILES or mtime < oldest_allowed:
+                os.remove(path)
+
+    def _load_cached_faces(self, key: Hashable) -> Tuple[bool, Optional[List]]:
+        """Load the faces stored for a cache key by an earlier run; returns (found, faces)"""
+        path = self._cached_faces_path(key)
+        if not os.path.exists(path):
+            return False, None
+        try:
+            # Mark the file as recently used so pruning keeps it
+            os.utime(path)
+            with np.load(path, allow_pickle=False) as data:
+                bboxes = data['bboxes']
+                if bboxes.shape[0] == 0:
+                    return True, None
+                kpss = data['kpss']
+                det_scores = data['det_scores']
+                landmarks = data['landmarks']
+                embeddings = data['embeddings']
+            faces = [
+                Face(
+                    bbox=bboxes[i],
+                    kps=kpss[i],
+                    det_score=det_scores[i],
+                    landmark_2d_106=landmarks[i],
+                    embedding=embeddings[i]
+                )
+                for i in range(bboxes.shape[0])
+            ]
+            return True, faces
+        except Exception as e:
+            print(f"Error loading cached faces {path}: {str(e)}")
+            return False, None
+
+    def _save_cached_faces(self, key: Hashable, faces: Optional[List]):
+        """Store the faces of an image under its cache key so later runs can skip detection"""
+        try:
+            os.makedirs(FACE_CACHE_DIR, exist_ok=True)
+            path = self._cached_faces_path(key)
+            if not faces:
+                # Remember that the image has no faces
+                np.savez(path, bboxes=np.empty((0, 4), dtype=np.float32))
+                return
+            np.savez(
+                path,
+                bboxes=np.stack([face.bbox for face in faces]).astype(np.float32),
+                kpss=np.stack([face.kps for face in faces]).astype(np.float32),
+                det_scores=np.array([face.det_score for face in faces], dtype=np.float32),
+                landmarks=np.stack([face.landmark_2d_106 for face in faces]).astype(np.float32),
+                embeddings=np.stack([face.embedding for face in faces]).astype(np.float32)
+            )
+            self._prune_cached_faces()
+        except Exception as e:
+            print(f"Error saving cached faces: {str(e)}")
+
     def _standard_face_comparison(self, faces1, faces2) -> float:
         """Standard face comparison using InsightFace embeddings"""
         # Validate faces were detected
         if faces1 is None or faces1[0] is None or faces2 is None or faces2[0] is None:
             return 0.0
         
-        # Get embeddings for the first face in each image
-        embedding1 = faces1[0].embedding
-        embedding2 = faces2[0].embedding
+        # Get unit-length embeddings for the first face in each image
+        embedding1 = faces1[0].normed_embedding
+        embedding2 = faces2[0].normed_embedding
         
         if embedding1 is None or embedding2 is None:
             return 0.0
         
-        # Normalize embeddings to unit length
-        embedding1_norm = embedding1 / np.linalg.norm(embedding1)
-        embedding2_norm = embedding2 / np.linalg.norm(embedding2)
-        
-        # Calculate cosine similarity
-        similarity = np.dot(embedding1_norm, embedding2_norm)
+        # Cosine similarity of unit vectors is their dot product
+        similarity = np.dot(embedding1, embedding2)
         
         # Ensure the similarity score is between 0 and 1
         similarity = max(0.0, min(1.0, float(similarity)))
         
         return similarity 
 
-    def compare_images(self, image1_path: str, image2_path: str) -> FaceMatchResult:
-        """Compare two images and return face match results"""
+    def compare_images(
+        self,
+        image1: Union[str, np.ndarray, Callable[[], np.ndarray]],
+        image2: Union[str, np.ndarray, Callable[[], np.ndarray]],
+        cache_keys: Optional[Tuple[Optional[Hashable], Optional[Hashable]]] = None,
+        persist: Optional[Tuple[bool, bool]] = None
+    ) -> FaceMatchResult:
+        """
+        Compare two images and return face match results
+        
+        Args:
+            image1, image2: Image file paths, already decoded (height, width, 3) uint8 BGR arrays, or functions
+                returning one, called only if the image's faces are not cached
+            cache_keys: Optional keys identifying the content of each image (e.g. path and mtime);
+                faces of an image seen before under the same key are reused instead of detected again
+            persist: Whether each image's faces may also be cached on disk across runs (default: both)
+            
+        Returns:
+            FaceMatchResult of the first face found in each image
+        """
         # Start timing
         start_time = time.time()
         
         # Process images and get faces
-        img1, faces1 = self._process_image(image1_path)
-        img2, faces2 = self._process_image(image2_path)
+        faces1, faces2 = self._get_faces([image1, image2], cache_keys, persist)
         
         # Initialize face locations and landmarks
         face1_location = None
@@ -1,10 +1,19 @@
 from PyQt6.QtGui import QImage
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Tuple
+import threading
 from injector import singleton, inject
+from numba import njit, prange
+import cv2
 import numpy as np
 
-@dataclass
+# Numba's default workqueue threading layer aborts the process if two parallel kernels are launched
+# at once (e.g. region stats on the GUI thread while a lighting transfer runs on a worker), so every
+# parallel kernel call holds this lock
+_parallel_kernel_lock = threading.Lock()
+
+@dataclass(slots=True, frozen=True)
 class RGBColorStats:
     pixel_count: int
     avg_r: float
@@ -16,12 +25,210 @@ class RGBColorStats:
     b_sd: float
     white_sd: float
 
+def _rgba_buffer_view(image: QImage, ptr) -> np.ndarray:
+    """
+    Wrap the buffer of an RGBA8888 image as a (height, width, 4) uint8 array without copying
+    
+    Args:
+        image: RGBA8888 QImage owning the buffer
+        ptr: image.bits() for a writable view or image.constBits() for a read-only one
+        
+    Returns:
+        Array view of the pixels, skipping any padding at the end of each scan line
+    """
+    ptr.setsize(image.sizeInBytes())
+    pixels = np.frombuffer(ptr, dtype=np.uint8)
+    pixels = pixels.reshape(image.height(), image.bytesPerLine() // 4, 4)
+    return pixels[:, :image.width()]
+
+def image_to_bgr_array(image: QImage) -> np.ndarray:
+    """
+    Copy the pixels of an image into a new (height, width, 3) uint8 BGR array, as OpenCV and InsightFace expect
+    
+    Args:
+        image: QImage to convert
+        
+    Returns:
+        BGR array that owns its memory, independent of the image
+    """
+    rgba_image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+    return cv2.cvtColor(_rgba_buffer_view(rgba_image, rgba_image.constBits()), cv2.COLOR_RGBA2BGR)
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def _region_color_sums(pixels, x1, y1, x2, y2):
+    """Integer sums and squared sums of R, G, B and R+G+B over a region, in one parallel pass over the rows"""
+    r_sum = 0
+    g_sum = 0
+    b_sum = 0
+    rgb_sum = 0
+    r_sq_sum = 0
+    g_sq_sum = 0
+    b_sq_sum = 0
+    rgb_sq_sum = 0
+    for y in prange(y1, y2 + 1):
+        for x in range(x1, x2 + 1):
+            r = np.int64(pixels[y, x, 0])
+            g = np.int64(pixels[y, x, 1])
+            b = np.int64(pixels[y, x, 2])
+            rgb = r + g + b
+            r_sum += r
+            g_sum += g
+            b_sum += b
+            rgb_sum += rgb
+            r_sq_sum += r * r
+            g_sq_sum += g * g
+            b_sq_sum += b * b
+            rgb_sq_sum += rgb * rgb
+    return r_sum, g_sum, b_sum, rgb_sum, r_sq_sum, g_sq_sum, b_sq_sum, rgb_sq_sum
+
+
+def _integral_images(pixels: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build zero-padded summed-area tables of the pixels and of the squared pixels
+    
+    Args:
+        pixels: (height, width, 3) array of color values
+        
+    Returns:
+        Tuple of (sum table, squared sum table), each of shape (height + 1, width + 1, 3)
+    """
+    # OpenCV builds both tables in one vectorized pass over the pixels
+    sums, sq_sums = cv2.integral2(np.ascontiguousarray(pixels), sdepth=cv2.CV_64F, sqdepth=cv2.CV_64F)
+    return sums, sq_sums
+
+
+@lru_cache(maxsize=None)
+def _falloff_profiles(tile_size: int) -> np.ndarray:
+    """
+    Precompute the cosine falloff weights along one axis of a tile for every possible tile size
+    
+    Args:
+        tile_size: Largest tile size
+        
+    Returns:
+        Array of shape (tile_size + 1, tile_size) where row n holds the weights of a tile of size n
+    """
+    profiles = np.zeros((tile_size + 1, tile_size), dtype=np.float32)
+    for size in range(1, tile_size + 1):
+        half_size = size / 2
+        norm_dist = np.abs(np.arange(size) - half_size) / half_size
+        profiles[size, :size] = np.where(norm_dist >= 1.0, 0.0, 0.5 * (1 + np.cos(norm_dist * np.pi)))
+    profiles.setflags(write=False)
+    return profiles
+
+
+@njit(cache=True)
+def _tile_mean_sd(sums, sq_sums, rx1, ry1, rx2, ry2, c):
+    """Mean and standard deviation of one channel of a tile from summed-area tables"""
+    pixel_count = (rx2 - rx1 + 1) * (ry2 - ry1 + 1)
+    total = sums[ry2 + 1, rx2 + 1, c] - sums[ry1, rx2 + 1, c] - sums[ry2 + 1, rx1, c] + sums[ry1, rx1, c]
+    sq_total = (sq_sums[ry2 + 1, rx2 + 1, c] - sq_sums[ry1, rx2 + 1, c]
+                - sq_sums[ry2 + 1, rx1, c] + sq_sums[ry1, rx1, c])
+    avg = total / pixel_count
+    # The tables hold exact integer sums, so n * sum(x^2) - sum(x)^2 is exact as well and a flat
+    # tile gets an SD of exactly 0; E[x^2] - E[x]^2 can leave a tiny residue that reads as non-flat
+    variance = (pixel_count * sq_total - total * total) / (pixel_count * pixel_count)
+    sd = np.sqrt(max(0.0, variance))
+    return avg, sd
+
+
+@njit(fastmath=True, cache=True)
+def _accumulate_lighting_tile(target, target_sums, target_sq_sums, ref_sums, ref_sq_sums,
+                              falloff_profiles, x1, y1, tile_x1, tile_y1, tile_x2, tile_y2,
+                              color_buffer, weight_buffer):
+    """Transfer the color statistics of one reference tile onto the target tile and accumulate it"""
+    # Look up the color statistics of this tile in both images. The per-pixel math below
+    # stays in float32 like the accumulation buffers; only the integral tables need float64
+    scale = np.zeros(3, dtype=np.float32)
+    offset = np.zeros(3, dtype=np.float32)
+    for c in range(3):
+        target_avg, target_sd = _tile_mean_sd(
+            target_sums, target_sq_sums, tile_x1 - x1, tile_y1 - y1, tile_x2 - x1, tile_y2 - y1, c
+        )
+        ref_avg, ref_sd = _tile_mean_sd(
+            ref_sums, ref_sq_sums, tile_x1 - x1, tile_y1 - y1, tile_x2 - x1, tile_y2 - y1, c
+        )
+        if target_sd == 0:
+            offset[c] = ref_avg
+        else:
+            scale[c] = ref_sd / target_sd
+            offset[c] = ref_avg - target_avg * scale[c]
+
+    # Weight each pixel by its distance from the tile center (cosine falloff). The falloff
+    # decreases with distance, so the weight of the larger distance is the smaller weight.
+    weights_x = falloff_profiles[tile_x2 - tile_x1 + 1]
+    weights_y = falloff_profiles[tile_y2 - tile_y1 + 1]
+    for y in range(tile_y1, tile_y2 + 1):
+        weight_y = weights_y[y - tile_y1]
+        for x in range(tile_x1, tile_x2 + 1):
+            weight = min(weights_x[x - tile_x1], weight_y)
+            if weight == 0:
+                continue
+
+            weight_buffer[y - y1, x - x1] += weight
+            for c in range(3):
+                new_value = min(np.float32(255.0), max(np.float32(0.0), np.rint(target[y, x, c] * scale[c] + offset[c])))
+                color_buffer[y - y1, x - x1, c] += new_value * weight
+
+
+@njit(parallel=True, cache=True)
+def _accumulate_lighting_tiles(target, target_sums, target_sq_sums, ref_sums, ref_sq_sums,
+                               falloff_profiles, x1, y1, x2, y2, tile_size, overlap,
+                               color_buffer, weight_buffer):
+    """Accumulate the weighted lighting transfer of every overlapping tile in the region"""
+    tile_ys = np.arange(y1, y2, overlap)
+    tile_xs = np.arange(x1, x2, overlap)
+
+    # Tile rows this many steps apart never overlap, so each group can run in parallel
+    group_count = (tile_size + overlap - 1) // overlap
+    for group in range(group_count):
+        for row in prange((len(tile_ys) - group + group_count - 1) // group_count):
+            tile_y1 = tile_ys[row * group_count + group]
+            tile_y2 = min(tile_y1 + tile_size - 1, y2)
+            for tile_x1 in tile_xs:
+                tile_x2 = min(tile_x1 + tile_size - 1, x2)
+                _accumulate_lighting_tile(
+                    target, target_sums, target_sq_sums, ref_sums, ref_sq_sums,
+                    falloff_profiles, x1, y1, tile_x1, tile_y1, tile_x2, tile_y2,
+                    color_buffer, weight_buffer
+                )
+
+
 @singleton
 class ImageController:
     @inject
     def __init__(self):
         pass
 
+    def _image_to_array(self, image: QImage) -> Tuple[np.ndarray, QImage]:
+        """
+        Get a (height, width, 4) RGBA uint8 view of the image buffer
+        
+        Args:
+            image: QImage to read
+            
+        Returns:
+            Tuple of (array view, RGBA QImage owning the buffer). Keep the
+            returned QImage alive for as long as the array is used.
+        """
+        rgba_image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+        return _rgba_buffer_view(rgba_image, rgba_image.constBits()), rgba_image
+
+    def _image_to_writable_array(self, image: QImage) -> np.ndarray:
+        """
+        Get a writable (height, width, 4) RGBA uint8 view of the image buffer
+        
+        Args:
+            image: QImage to expose (converted to RGBA8888 in-place if needed)
+            
+        Returns:
+            Array view; writes to it modify the image directly
+        """
+        if image.format() != QImage.Format.Format_RGBA8888:
+            image.convertTo(QImage.Format.Format_RGBA8888)
+        return _rgba_buffer_view(image, image.bits())
+
     def calculate_region_rgb_color_stats(
         self,
         image: QImage,
@@ -37,72 +244,43 @@ class ImageController:
         Returns:
             RGBColorStats object containing RGB and white averages and standard deviations
         """
+        # Clip the region to the image once instead of checking every pixel
         x1, y1, x2, y2 = region
-        
-        # Initialize variables for calculation
-        r_sum = g_sum = b_sum = white_sum = 0
-        r_values = []
-        g_values = []
-        b_values = []
-        white_values = []
-        pixel_count = 0
-
-        # Calculate sums and collect values
-        for y in range(y1, y2 + 1):
-            for x in range(x1, x2 + 1):
-                if x < 0 or y < 0 or x >= image.width() or y >= image.height():
-                    continue
-                    
-                pixel = image.pixel(x, y)
-                r = (pixel >> 16) & 0xFF
-                g = (pixel >> 8) & 0xFF
-                b = pixel & 0xFF
-                
-                r_sum += r
-                g_sum += g
-                b_sum += b
-                
-                # Calculate white value
-                white_value = (r + g + b) / 3
-                white_sum += white_value
-                
-                # Store values for SD calculation
-                r_values.append(r)
-                g_values.append(g)
-                b_values.append(b)
-                white_values.append(white_value)
-                pixel_count += 1
-
-        if pixel_count == 0:
+        x1 = max(0, x1)
+        y1 = max(0, y1)
+        x2 = min(image.width() - 1, x2)
+        y2 = min(image.height() - 1, y2)
+        if x2 < x1 or y2 < y1:
             return RGBColorStats(0, 0, 0, 0, 0, 0, 0, 0, 0)
 
-        # Calculate averages
+        # Accumulate the sums straight from the image buffer
+        image_array, rgba_image = self._image_to_array(image)
+        with _parallel_kernel_lock:
+            (r_sum, g_sum, b_sum, rgb_sum,
+             r_sq_sum, g_sq_sum, b_sq_sum, rgb_sq_sum) = _region_color_sums(image_array, x1, y1, x2, y2)
+        pixel_count = (x2 - x1 + 1) * (y2 - y1 + 1)
+
+        # Calculate averages and standard deviations using var = E[x^2] - E[x]^2
         avg_r = r_sum / pixel_count
         avg_g = g_sum / pixel_count
         avg_b = b_sum / pixel_count
-        avg_white = white_sum / pixel_count
-
-        # Calculate standard deviations
-        r_squared_diff_sum = sum((x - avg_r) ** 2 for x in r_values)
-        g_squared_diff_sum = sum((x - avg_g) ** 2 for x in g_values)
-        b_squared_diff_sum = sum((x - avg_b) ** 2 for x in b_values)
-        white_squared_diff_sum = sum((x - avg_white) ** 2 for x in white_values)
-        
-        r_sd = (r_squared_diff_sum / pixel_count) ** 0.5
-        g_sd = (g_squared_diff_sum / pixel_count) ** 0.5
-        b_sd = (b_squared_diff_sum / pixel_count) ** 0.5
-        white_sd = (white_squared_diff_sum / pixel_count) ** 0.5
+        # White is (R+G+B)/3, so its sums are the R+G+B sums divided by 3 and 9
+        avg_white = rgb_sum / (3 * pixel_count)
+        r_sd = max(r_sq_sum / pixel_count - avg_r ** 2, 0) ** 0.5
+        g_sd = max(g_sq_sum / pixel_count - avg_g ** 2, 0) ** 0.5
+        b_sd = max(b_sq_sum / pixel_count - avg_b ** 2, 0) ** 0.5
+        white_sd = max(rgb_sq_sum / (9 * pixel_count) - avg_white ** 2, 0) ** 0.5
 
         return RGBColorStats(
             pixel_count=pixel_count,
-            avg_r=avg_r,
-            avg_g=avg_g,
-            avg_b=avg_b,
-            avg_white=avg_white,
-            r_sd=r_sd,
-            g_sd=g_sd,
-            b_sd=b_sd,
-            white_sd=white_sd
+            avg_r=float(avg_r),
+            avg_g=float(avg_g),
+            avg_b=float(avg_b),
+            avg_white=float(avg_white),
+            r_sd=float(r_sd),
+            g_sd=float(g_sd),
+            b_sd=float(b_sd),
+            white_sd=float(white_sd)
         )
 
     def apply_region_rgb_color_stats(
@@ -130,45 +308,42 @@ class ImageController:
             2. Update your QLabel or other widget that displays the pixmap
             3. Call update() or repaint() on the widget to refresh the display
         """
+        # Clip the region to the image once instead of checking every pixel
         x1, y1, x2, y2 = region
-        
-        # For each color channel, calculate scaling and offset factors
-        def transform_value(value: float, curr_avg: float, curr_sd: float, 
-                        target_avg: float, target_sd: float) -> float:
+        x1 = max(0, x1)
+        y1 = max(0, y1)
+        x2 = min(image.width() - 1, x2)
+        y2 = min(image.height() - 1, y2)
+        if x2 < x1 or y2 < y1:
+            return image
+
+        # For each color channel, calculate scaling and offset factors once.
+        # A flat channel (SD of 0) maps every value to the target average.
+        channels = [
+            (color_stats.avg_r, color_stats.r_sd, source_color_stats.avg_r, source_color_stats.r_sd),
+            (color_stats.avg_g, color_stats.g_sd, source_color_stats.avg_g, source_color_stats.g_sd),
+            (color_stats.avg_b, color_stats.b_sd, source_color_stats.avg_b, source_color_stats.b_sd),
+        ]
+        scale = np.zeros(3, dtype=np.float32)
+        offset = np.zeros(3, dtype=np.float32)
+        for i, (curr_avg, curr_sd, target_avg, target_sd) in enumerate(channels):
             if curr_sd == 0:
-                return target_avg
-            # Scale the deviation from mean by the ratio of standard deviations
-            scaled_deviation = (value - curr_avg) * (target_sd / curr_sd)
-            # Center around the target mean
-            return scaled_deviation + target_avg
-        
-        # Process each pixel in the region
-        for y in range(y1, y2 + 1):
-            for x in range(x1, x2 + 1):
-                if x < 0 or y < 0 or x >= image.width() or y >= image.height():
-                    continue
-                    
-                pixel = image.pixel(x, y)
-                r = (pixel >> 16) & 0xFF
-                g = (pixel >> 8) & 0xFF
-                b = pixel & 0xFF
-                
-                # Transform each color channel
-                new_r = transform_value(r, color_stats.avg_r, color_stats.r_sd,
-                                    source_color_stats.avg_r, source_color_stats.r_sd)
-                new_g = transform_value(g, color_stats.avg_g, color_stats.g_sd,
-                                    source_color_stats.avg_g, source_color_stats.g_sd)
-                new_b = transform_value(b, color_stats.avg_b, color_stats.b_sd,
-                                    source_color_stats.avg_b, source_color_stats.b_sd)
-                
-                # Clamp values to valid range [0, 255]
-                new_r = max(0, min(255, round(new_r)))
-                new_g = max(0, min(255, round(new_g)))
-                new_b = max(0, min(255, round(new_b)))
-                
-                # Create new pixel value and set it
-                new_pixel = (new_r << 16) | (new_g << 8) | new_b
-                image.setPixel(x, y, new_pixel)
+                offset[i] = target_avg
+            else:
+                scale[i] = target_sd / curr_sd
+                offset[i] = target_avg - curr_avg * scale[i]
+
+        # Only 256 values exist per channel, so fold the transform into one lookup table per channel
+        lookup_tables = np.arange(256, dtype=np.float32)[:, np.newaxis] * scale + offset
+        np.rint(lookup_tables, out=lookup_tables)
+        np.clip(lookup_tables, 0, 255, out=lookup_tables)
+        lookup_tables = lookup_tables.astype(np.uint8)
+
+        # Remap the region in place in the image buffer
+        image_array = self._image_to_writable_array(image)
+        region_pixels = image_array[y1:y2 + 1, x1:x2 + 1]
+        for i in range(3):
+            region_pixels[..., i] = lookup_tables[region_pixels[..., i], i]
 
         return image 
 
@@ -191,124 +366,49 @@ class ImageController:
             region: Tuple of (x1, y1, x2, y2) coordinates
             
         Returns:
-            Modified QImage with transferred lighting
+            Modified QImage with transferred lighting (note: the target image is modified in-place)
         """
-        x1, y1, x2, y2 = region
         TILE_SIZE = 32
         OVERLAP = 16
-        
-        # Create a copy of the target image to work with
-        result_image = target_image.copy()
-        
+
+        # Clip the region to the area covered by both images
+        x1, y1, x2, y2 = region
+        x1 = max(0, x1)
+        y1 = max(0, y1)
+        x2 = min(target_image.width() - 1, reference_image.width() - 1, x2)
+        y2 = min(target_image.height() - 1, reference_image.height() - 1, y2)
+        if x2 <= x1 or y2 <= y1:
+            return target_image
+
+        # The target is only written after all tiles are accumulated, so one writable view serves both
+        target_array = self._image_to_writable_array(target_image)
+        reference_array, reference_rgba = self._image_to_array(reference_image)
+
+        # Summed-area tables give every tile's statistics in constant time
+        target_sums, target_sq_sums = _integral_images(target_array[y1:y2 + 1, x1:x2 + 1, :3])
+        ref_sums, ref_sq_sums = _integral_images(reference_array[y1:y2 + 1, x1:x2 + 1, :3])
+
         # Create weight and color accumulation buffers
         width = x2 - x1 + 1
         height = y2 - y1 + 1
         weight_buffer = np.zeros((height, width), dtype=np.float32)
         color_buffer = np.zeros((height, width, 3), dtype=np.float32)
-        
+
         # First pass: accumulate weights and transformed colors
-        for tile_y in range(y1, y2, OVERLAP):
-            for tile_x in range(x1, x2, OVERLAP):
-                # Calculate tile boundaries
-                tile_x1 = tile_x
-                tile_y1 = tile_y
-                tile_x2 = min(tile_x + TILE_SIZE - 1, x2)
-                tile_y2 = min(tile_y + TILE_SIZE - 1, y2)
-                
-                # Skip if tile is completely outside the region
-                if tile_x1 >= x2 or tile_y1 >= y2:
-                    continue
-                
-                # Calculate effective tile size for this tile
-                effective_width = tile_x2 - tile_x1 + 1
-                effective_height = tile_y2 - tile_y1 + 1
-                
-                # Calculate color statistics for this tile
-                tile_region = (tile_x1, tile_y1, tile_x2, tile_y2)
-                target_stats = self.calculate_region_rgb_color_stats(target_image, tile_region)
-                ref_stats = self.calculate_region_rgb_color_stats(reference_image, tile_region)
-                
-                # Process each pixel in the tile
-                for y in range(tile_y1, tile_y2 + 1):
-                    for x in range(tile_x1, tile_x2 + 1):
-                        # Calculate relative position in the region
-                        rel_x = x - x1
-                        rel_y = y - y1
-                        
-                        # Calculate distance from tile center, adjusted for partial tiles
-                        tile_center_x = tile_x1 + effective_width / 2
-                        tile_center_y = tile_y1 + effective_height / 2
-                        dx = abs(x - tile_center_x)
-                        dy = abs(y - tile_center_y)
-                        
-                        # Calculate weight based on distance from center
-                        # Use the effective tile size for max_dist
-                        max_dist_x = effective_width / 2
-                        max_dist_y = effective_height / 2
-                        
-                        # Calculate normalized distances
-                        norm_dx = dx / max_dist_x
-                        norm_dy = dy / max_dist_y
-                        
-                        # Use the maximum normalized distance for the weight
-                        # This ensures smooth transitions even for rectangular tiles
-                        norm_dist = max(norm_dx, norm_dy)
-                        
-                        if norm_dist >= 1.0:
-                            weight = 0
-                        else:
-                            # Smooth falloff using cosine interpolation
-                            weight = 0.5 * (1 + np.cos(norm_dist * np.pi))
-                        
-                        # Get original pixel
-                        pixel = target_image.pixel(x, y)
-                        r = (pixel >> 16) & 0xFF
-                        g = (pixel >> 8) & 0xFF
-                        b = pixel & 0xFF
-                        
-                        # Transform color values
-                        def transform_value(value: float, curr_avg: float, curr_sd: float, 
-                                        target_avg: float, target_sd: float) -> float:
-                            if curr_sd == 0:
-                                return target_avg
-                            scaled_deviation = (value - curr_avg) * (target_sd / curr_sd)
-                            return scaled_deviation + target_avg
-                        
-                        # Calculate transformed values
-                        new_r = transform_value(r, target_stats.avg_r, target_stats.r_sd,
-                                            ref_stats.avg_r, ref_stats.r_sd)
-                        new_g = transform_value(g, target_stats.avg_g, target_stats.g_sd,
-                                            ref_stats.avg_g, ref_stats.g_sd)
-                        new_b = transform_value(b, target_stats.avg_b, target_stats.b_sd,
-                                            ref_stats.avg_b, ref_stats.b_sd)
-                        
-                        # Clamp values
-                        new_r = max(0, min(255, round(new_r)))
-                        new_g = max(0, min(255, round(new_g)))
-                        new_b = max(0, min(255, round(new_b)))
-                        
-                        # Accumulate weights and colors
-                        weight_buffer[rel_y, rel_x] += weight
-                        color_buffer[rel_y, rel_x, 0] += new_r * weight
-                        color_buffer[rel_y, rel_x, 1] += new_g * weight
-                        color_buffer[rel_y, rel_x, 2] += new_b * weight
-        
-        # Second pass: normalize and apply final colors
-        for y in range(height):
-            for x in range(width):
-                if weight_buffer[y, x] > 0:
-                    # Normalize colors by accumulated weight
-                    final_r = round(color_buffer[y, x, 0] / weight_buffer[y, x])
-                    final_g = round(color_buffer[y, x, 1] / weight_buffer[y, x])
-                    final_b = round(color_buffer[y, x, 2] / weight_buffer[y, x])
-                    
-                    # Clamp values
-                    final_r = max(0, min(255, final_r))
-                    final_g = max(0, min(255, final_g))
-                    final_b = max(0, min(255, final_b))
-                    
-                    # Set final pixel
-                    final_pixel = (final_r << 16) | (final_g << 8) | final_b
-                    result_image.setPixel(x + x1, y + y1, final_pixel)
-        
-        return result_image
+        with _parallel_kernel_lock:
+            _accumulate_lighting_tiles(
+                target_array, target_sums, target_sq_sums, ref_sums, ref_sq_sums,
+                _falloff_profiles(TILE_SIZE), x1, y1, x2, y2,
+                TILE_SIZE, OVERLAP,
+                color_buffer, weight_buffer
+            )
+
+        # Second pass: normalize and apply final colors directly in the target image
+        covered = weight_buffer > 0
+        np.divide(color_buffer, weight_buffer[..., np.newaxis], out=color_buffer, where=covered[..., np.newaxis])
+        np.rint(color_buffer, out=color_buffer)
+        np.clip(color_buffer, 0, 255, out=color_buffer)
+        region_pixels = target_array[y1:y2 + 1, x1:x2 + 1, :3]
+        region_pixels[covered] = color_buffer[covered]
+
+        return target_image
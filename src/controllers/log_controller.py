@@ -1,31 +1,31 @@
-from typing import List, Callable
+from typing import Tuple, Callable
 from injector import singleton
 
 @singleton
 class LogController:
     def __init__(self):
-        self._listeners: List[Callable[[str], None]] = []
-        self._similarity_listeners: List[Callable[[float], None]] = []
+        # Listeners are kept in tuples that are replaced on change, so broadcasting
+        # iterates a stable snapshot even if a listener adds or removes listeners
+        self._listeners: Tuple[Callable[[str], None], ...] = ()
+        self._similarity_listeners: Tuple[Callable[[float], None], ...] = ()
     
     def add_listener(self, listener: Callable[[str], None]):
-        """Add a new listener for log messages"""
-        if listener not in self._listeners:
-            self._listeners.append(listener)
+        """Add a new listener for log messages; each listener is expected to be added once"""
+        self._listeners = self._listeners + (listener,)
     
     def remove_listener(self, listener: Callable[[str], None]):
         """Remove a listener"""
         if listener in self._listeners:
-            self._listeners.remove(listener)
+            self._listeners = tuple(l for l in self._listeners if l != listener)
     
     def add_similarity_listener(self, listener: Callable[[float], None]):
-        """Add a new listener for similarity score updates"""
-        if listener not in self._similarity_listeners:
-            self._similarity_listeners.append(listener)
+        """Add a new listener for similarity score updates; each listener is expected to be added once"""
+        self._similarity_listeners = self._similarity_listeners + (listener,)
     
     def remove_similarity_listener(self, listener: Callable[[float], None]):
         """Remove a similarity score listener"""
         if listener in self._similarity_listeners:
-            self._similarity_listeners.remove(listener)
+            self._similarity_listeners = tuple(l for l in self._similarity_listeners if l != listener)
     
     def log_message(self, message: str):
         """Broadcast a log message to all listeners"""
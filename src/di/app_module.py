@@ -1,19 +1,34 @@
-from injector import Module, singleton, inject
-from controllers.face_controller import FaceController
-from ui.main_window import MainWindow
-from typing import Dict, Type
+from injector import Module, Provider, Injector
+from typing import Dict, Type, Union
+from functools import lru_cache
 import importlib
 
+@lru_cache(maxsize=None)
+def _resolve_class(path: str) -> Type:
+    """Import and return the class named by a dotted 'module.ClassName' path"""
+    module_path, class_name = path.rsplit('.', 1)
+    module = importlib.import_module(module_path)
+    return getattr(module, class_name)
+
+class _LazyClassProvider(Provider):
+    """Resolve a dotted class path only when the binding is first requested"""
+    def __init__(self, path: str):
+        self._path = path
+
+    def get(self, injector: Injector):
+        return injector.get(_resolve_class(self._path))
+
 class DynamicAppModule(Module):
-    def __init__(self, config: Dict[str, str]):
+    def __init__(self, config: Dict[str, Union[str, Type]]):
         self.config = config
         super().__init__()
 
     def configure(self, binder):
         for interface, implementation in self.config.items():
-            module_path, class_name = implementation.rsplit('.', 1)
-            module = importlib.import_module(module_path)
-            cls = getattr(module, class_name)
-            binder.bind(interface, to=cls)
-
+            # Classes can be given directly; dotted paths are imported on first use so that
+            # heavy modules (e.g. the face controller's ML stack) don't load at startup
+            if isinstance(implementation, type):
+                binder.bind(interface, to=implementation)
+            else:
+                binder.bind(interface, to=_LazyClassProvider(implementation))
 
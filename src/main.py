@@ -1,9 +1,3 @@
-import cv2
-import numpy as np
-import insightface
-from insightface.app import FaceAnalysis
-from PIL import Image, ImageEnhance
-import time
 import sys
 from PyQt6.QtWidgets import QApplication
 from ui.main_window import MainWindow
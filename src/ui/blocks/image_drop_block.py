@@ -1,14 +1,28 @@
 from PyQt6.QtWidgets import QLabel, QApplication, QWidget, QVBoxLayout, QPushButton, QHBoxLayout, QFileDialog
-from PyQt6.QtCore import Qt, QRect, pyqtSignal
-from PyQt6.QtGui import (QDragEnterEvent, QDropEvent, QPixmap, QKeyEvent, 
-                        QPainter, QPen)
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QDragEnterEvent, QDropEvent, QImage
 
 from controllers.display_controller import DisplayController
-from controllers.image_controller import RGBColorStats
 from ..components.image_area import ImageArea
 from injector import inject
+from typing import Optional
 import os
 
+class _SaveImageSignals(QObject):
+    finished = pyqtSignal(str, bool)  # Signal with file name and whether saving succeeded
+
+class _SaveImageTask(QRunnable):
+    """Encode and write an image on a worker thread"""
+    def __init__(self, image: QImage, file_name: str):
+        super().__init__()
+        self.signals = _SaveImageSignals()
+        self._image = image
+        self._file_name = file_name
+
+    def run(self):
+        saved = self._image.save(self._file_name)
+        self.signals.finished.emit(self._file_name, saved)
+
 class ImageDropBlock(QWidget):
     # Define signal for all events
     block_event = pyqtSignal(str, str)  # Signal with event type and optional parameter
@@ -30,38 +44,19 @@ class ImageDropBlock(QWidget):
         # Create image meta area
         self.image_meta = QLabel()
         self.image_meta.setFixedHeight(30)
-        self.image_meta.setStyleSheet("""
-            QLabel {
-                background-color: #f0f0f0;
-                border: 1px solid #ddd;
-                padding: 5px;
-            }
-        """)
+        self.image_meta.setObjectName("imageInfo")
         
         # Create image info area
         self.logging = QLabel()
         self.logging.setFixedHeight(90)
-        self.logging.setStyleSheet("""
-            QLabel {
-                background-color: #f0f0f0;
-                border: 1px solid #ddd;
-                padding: 5px;
-            }
-        """)
+        self.logging.setObjectName("imageInfo")
         
         # Create image area using ImageArea
         self.image_area = ImageArea(self._log_message)
         self.image_area.setMinimumSize(300, 500)
         self.image_area.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.image_area.setText(f"Drop {title} here")
-        self.image_area.setStyleSheet("""
-            QLabel {
-                border: 2px dashed #aaa;
-                border-radius: 5px;
-                background-color: #f0f0f0;
-                padding: 10px;
-            }
-        """)
+        self.image_area.setObjectName("imageArea")
         
         # Add widgets to layout
         self.layout.addWidget(self.image_area)
@@ -70,32 +65,15 @@ class ImageDropBlock(QWidget):
         
         # Initialize other attributes
         self.is_active = False
+        self._save_image_task = None
+        
+        # Meta text of the last loaded image and the image key it was built for
+        self._meta_key = None
+        self._meta_text = None
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
     def _add_top_bar_buttons(self):
         """Add buttons to the top bar"""
-        # Button style template
-        button_style = """
-            QPushButton {
-                background-color: #2196F3;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 5px 10px;
-                font-size: 12px;
-                font-weight: 500;
-            }
-            QPushButton:hover {
-                background-color: #1976D2;
-            }
-            QPushButton:pressed {
-                background-color: #0D47A1;
-            }
-            QPushButton:disabled {
-                background-color: #BDBDBD;
-            }
-        """
-        
         # Define button configurations
         buttons = [
             ("貼上", self._top_bar_paste_image),
@@ -114,7 +92,7 @@ class ImageDropBlock(QWidget):
             button = QPushButton(text)
             button.setFixedSize(80, 28)
             button.clicked.connect(callback)
-            button.setStyleSheet(button_style)
+            button.setObjectName("topBarButton")
             top_bar_layout.addWidget(button)
         
         # Add stretch to push buttons to the left
@@ -129,11 +107,8 @@ class ImageDropBlock(QWidget):
         if mime_data.hasImage():
             image = clipboard.image()
             if not image.isNull():
-                # Save clipboard image to temp file
-                temp_path = f"tmp/temp_{self.title}.png"
-                pixmap = QPixmap.fromImage(image)
-                pixmap.save(temp_path)
-                self.load_image(temp_path)
+                # Display and compare the clipboard image directly; it is not written to a file
+                self.load_image(f"Pasted {self.title}", image, temporary=True)
             else:
                 self._log_message("Error: Invalid image in clipboard")
         else:
@@ -159,10 +134,20 @@ class ImageDropBlock(QWidget):
         if self.image_area.image_pixmap:  # Check if there is an image
             file_name, _ = QFileDialog.getSaveFileName(self, "Save Image", "", "Images (*.png *.jpg);;All Files (*)")
             if file_name:  # If a file name is provided
-                self.image_area.image_pixmap.save(file_name)  # Save the image
+                # Encode and write on a worker thread; QPixmap is GUI-thread only, so hand over a QImage
+                task = _SaveImageTask(self.image_area.image_pixmap.toImage(), file_name)
+                task.signals.finished.connect(self._on_save_image_finished)
+                self._save_image_task = task
+                QThreadPool.globalInstance().start(task)
         else:
             self._log_message("Error: No image to download")  # Log error if no image
 
+    def _on_save_image_finished(self, file_name: str, saved: bool):
+        if saved:
+            self._log_message(f"Image saved to {os.path.basename(file_name)}")
+        else:
+            self._log_message(f"Error: Could not save image to {os.path.basename(file_name)}")
+
     def _log_message(self, message: str):
         """Add a message to the system message area"""
         self.logging.setText(message)
@@ -183,24 +168,34 @@ class ImageDropBlock(QWidget):
             event.ignore()
     """ End: Overrriding methods"""
 
-    def load_image(self, source: str):
-        """Process and display the image from a file path"""
+    def load_image(self, source: str, image: Optional[QImage] = None, temporary: bool = False):
+        """Process and display the image from a file path, or the already decoded image of that file;
+        a temporary image (e.g. pasted) has no file, is only named by source and is not cached on disk"""
                 
-        # Store the original pixmap
-        self.image_area.load_image(source)
-        if not self.image_area.image_pixmap:
-            return
-        
-        self.image_area.clear_region()
-        
-        # Get file size and dimensions
-        width = self.image_area.image_pixmap.width()
-        height = self.image_area.image_pixmap.height()
-        file_size = os.path.getsize(source)
-        size_str = self.display_controller.format_file_size(file_size)
-        
-        # Update image meta with basic info
-        self.image_meta.setText(f"{source.split('/')[-1]}, {width}x{height}, {size_str}")
+        # Store the original pixmap and reset the selection, repainting the image area once for both
+        self.image_area.setUpdatesEnabled(False)
+        try:
+            self.image_area.load_image(source, image, temporary)
+            if not self.image_area.image_pixmap:
+                return
+            
+            self.image_area.clear_region()
+        finally:
+            self.image_area.setUpdatesEnabled(True)
+            self.image_area.update()
+        
+        # Update image meta with basic info, rebuilding it only if the image is new or was modified
+        meta_key = self.image_area.image_key
+        if meta_key != self._meta_key:
+            width = self.image_area.image_pixmap.width()
+            height = self.image_area.image_pixmap.height()
+            self._meta_text = f"{self.image_area.image_basename}, {width}x{height}"
+            stat = self.image_area.image_stat
+            if stat is not None:
+                size_str = self.display_controller.format_file_size(stat.st_size)
+                self._meta_text += f", {size_str}"
+            self._meta_key = meta_key
+        self.image_meta.setText(self._meta_text)
         
         # Emit signal that image was loaded
         self.block_event.emit("image_loaded", "")
@@ -1,13 +1,46 @@
-from typing import Callable, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
+import itertools
+import os
 from PyQt6.QtGui import QImage
-from PyQt6.QtWidgets import QLabel
-from PyQt6.QtCore import Qt, QRect
-from PyQt6.QtGui import (QDragEnterEvent, QDropEvent, QPixmap, QPainter, QPen)
-import numpy as np
+from PyQt6.QtWidgets import QLabel, QStyle
+from PyQt6.QtCore import Qt, QRect, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QPixmap, QPixmapCache, QPainter, QPen
 
-from controllers.image_controller import ImageController, RGBColorStats
 from injector import inject
 
+if TYPE_CHECKING:
+    from controllers.image_controller import ImageController, RGBColorStats
+
+# Numbers edits of loaded images, so an edited image never shares a key with another version of its file
+_edit_generations = itertools.count(1)
+
+class _LightingTransferSignals(QObject):
+    finished = pyqtSignal(QImage)
+    failed = pyqtSignal(str)
+
+class _LightingTransferTask(QRunnable):
+    """Run a lighting transfer on a worker thread and emit the resulting image"""
+    def __init__(self, image_controller: "ImageController", target_image: QImage,
+                 reference_image: QImage, region: Tuple[int, int, int, int]):
+        super().__init__()
+        self.signals = _LightingTransferSignals()
+        self._image_controller = image_controller
+        self._target_image = target_image
+        self._reference_image = reference_image
+        self._region = region
+
+    def run(self):
+        try:
+            updated_image = self._image_controller.apply_region_lighting_transfer(
+                self._target_image,
+                self._reference_image,
+                self._region,
+            )
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(updated_image)
+
 class ImageArea(QLabel):
     """Custom QLabel that accepts drag and drop"""
     @inject
@@ -19,37 +52,85 @@ class ImageArea(QLabel):
         self.start_point = None
         self.current_point = None
         self.selection_box = None
+        self._drag_rect = QRect()
         self.image_pixmap = None
+        self._image = None
         self.image_source = None
+        self.image_basename = None
+        self.image_stat = None
+        self.image_is_temporary = False
+        self.image_is_edited = False
+        # Hashable identity of the loaded image content: (path, mtime, size) of a file, or the
+        # cache key of a pasted image, plus an edit generation once its colors are edited
+        self.image_key = None
+        self._loaded_image_key = None
         self.region_color_stats = None
         self.region = None
         
         # Store references to meta and logging labels
         self._log_message = log_message
-        self._image_controller = ImageController()
+        # Created on the first image load, so its Numba and OpenCV imports don't slow down startup
+        self._image_controller = None
         
         # Add display pixmap for drawing operations
         self._display_pixmap = None
         
+        # Last scaled display pixmap and the (pixmap cache key, width, height, mode) it was made for
+        self._scaled_pixmap = None
+        self._scaled_pixmap_key = None
+        
+        # Position of the scaled image within the label and its scale relative to the original,
+        # recomputed only when the pixmap or the label size changes
+        self._scaled_rect = None
+        self._scale_x = 1.0
+        self._scale_y = 1.0
+        
+        # Lighting transfer running in the background, if any
+        self._lighting_transfer_task = None
+        
+        # Area covered by the selection box at the last repaint while dragging
+        self._last_paint_rect = QRect()
+        
     def _fit_image_to_screen(self):
-        # Scale the image to fit the label while maintaining aspect ratio
-        scaled_pixmap = self._display_pixmap.scaled(
+        # Scale the image to fit the label while maintaining aspect ratio,
+        # reusing the last scaled pixmap if neither the image nor the size changed.
+        # While a selection is being dragged use the cheaper nearest-neighbour scaling;
+        # mouseReleaseEvent refits with smooth scaling once the drag ends
+        if self._display_pixmap is None:
+            return
+        if self.drawing:
+            mode = Qt.TransformationMode.FastTransformation
+        else:
+            mode = Qt.TransformationMode.SmoothTransformation
+        cache_key = (self._display_pixmap.cacheKey(), self.width(), self.height(), mode)
+        if cache_key == self._scaled_pixmap_key:
+            # Already showing this exact scaled pixmap, so there is nothing to redo
+            return
+        self._scaled_pixmap = self._display_pixmap.scaled(
             self.size(), 
             Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation
+            mode
         )
-        self.setPixmap(scaled_pixmap)
+        self._scaled_pixmap_key = cache_key
+        self.setPixmap(self._scaled_pixmap)
+        self._scaled_rect = None
 
     def _get_scaled_image_rect(self):
         """Get the rectangle of the scaled image within the label"""
-        if self.pixmap():
-            scaled_size = self.pixmap().size()
-            x = (self.width() - scaled_size.width()) // 2
-            y = (self.height() - scaled_size.height()) // 2
-            return QRect(x, y, scaled_size.width(), scaled_size.height())
-        return QRect()
-
-    def _draw_face_box(self):
+        if self._scaled_rect is None:
+            self._scaled_rect = QRect()
+            if not self.pixmap().isNull():
+                # Place the pixmap exactly where QLabel draws it, so partial repaints line up with full ones
+                scaled_size = self.pixmap().size()
+                direction = self.layoutDirection()
+                alignment = QStyle.visualAlignment(direction, self.alignment())
+                self._scaled_rect = QStyle.alignedRect(direction, alignment, scaled_size, self.contentsRect())
+                if self._display_pixmap:
+                    self._scale_x = scaled_size.width() / self._display_pixmap.width()
+                    self._scale_y = scaled_size.height() / self._display_pixmap.height()
+        return self._scaled_rect
+
+    def _draw_face_box(self, painter: QPainter):
         """Draw face detection box on the current widget considering image scaling and position"""
         if not self._display_pixmap or not hasattr(self, 'face_location') or not self.face_location:
             return
@@ -59,9 +140,9 @@ class ImageArea(QLabel):
         if not scaled_rect.isValid():
             return
             
-        # Calculate scaling factors between original image and current display
-        scale_x = scaled_rect.width() / self._display_pixmap.width()
-        scale_y = scaled_rect.height() / self._display_pixmap.height()
+        # Scaling factors between original image and current display
+        scale_x = self._scale_x
+        scale_y = self._scale_y
         
         # Get face location coordinates
         top, left, bottom, right = self.face_location
@@ -72,10 +153,6 @@ class ImageArea(QLabel):
         scaled_right = int(right * scale_x) + scaled_rect.left()
         scaled_bottom = int(bottom * scale_y) + scaled_rect.top()
         
-        # Create painter for the widget
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
         # Set up the pen for drawing
         pen = QPen(Qt.GlobalColor.red)
         pen.setWidth(2)
@@ -88,15 +165,8 @@ class ImageArea(QLabel):
             scaled_right - scaled_left,
             scaled_bottom - scaled_top
         )
-        
-        painter.end()
 
-    def _draw_selection_box(self):
-        painter = QPainter(self)
-        
-        # Enable antialiasing for smoother lines
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
+    def _draw_selection_box(self, painter: QPainter):
         # Set up the pen
         pen = QPen(Qt.GlobalColor.green)
         pen.setWidth(2)
@@ -104,13 +174,10 @@ class ImageArea(QLabel):
         
         if self.drawing:
             # Draw current selection rectangle
-            rect = QRect(self.start_point, self.current_point).normalized()
-            painter.drawRect(rect)
+            painter.drawRect(self._drag_rect)
         elif self.selection_box:
             # Draw final selection rectangle
             painter.drawRect(self.selection_box)
-        
-        painter.end()
 
     def _update_selection_box(self, box: QRect):
         self.selection_box = box
@@ -127,11 +194,9 @@ class ImageArea(QLabel):
         if not scaled_rect.isValid():
             return
 
-        # Calculate scaling factors
-        width = self.image_pixmap.width()
-        height = self.image_pixmap.height()
-        scale_x = width / scaled_rect.width()
-        scale_y = height / scaled_rect.height()
+        # Scaling factors from the display back to the original image
+        scale_x = 1 / self._scale_x
+        scale_y = 1 / self._scale_y
 
         # Transform selection box coordinates to original image coordinates
         selection_width = self.selection_box.width()
@@ -141,10 +206,10 @@ class ImageArea(QLabel):
         orig_x2 = int((self.selection_box.right() - scaled_rect.left()) * scale_x)
         orig_y2 = int((self.selection_box.bottom() - scaled_rect.top()) * scale_y)
 
-        # Get image data and calculate stats using image_controller
-        image = self.image_pixmap.toImage()
+        # Calculate stats on the kept RGBA image using image_controller; it is read
+        # through a zero-copy view, so no pixmap-to-image conversion is needed
         region = (orig_x1, orig_y1, orig_x2, orig_y2)
-        stats = self._image_controller.calculate_region_rgb_color_stats(image, region)
+        stats = self._image_controller.calculate_region_rgb_color_stats(self._image, region)
 
         # Store stats and region
         self.region_color_stats = stats
@@ -161,11 +226,15 @@ class ImageArea(QLabel):
     """ Begin: Overrriding methods"""
     def mousePressEvent(self, event):
         """Handle mouse press events"""
-        if self.pixmap() and event.button() == Qt.MouseButton.LeftButton:
+        if not self.pixmap().isNull() and event.button() == Qt.MouseButton.LeftButton:
             self.drawing = True
             self.start_point = event.pos()
-            self.current_point = event.pos()
+            self.current_point = self.start_point
+            self._start_x = self.start_point.x()
+            self._start_y = self.start_point.y()
             self.selection_box = None
+            self._drag_rect = QRect(self._start_x, self._start_y, 1, 1)
+            self._last_paint_rect = self._drag_rect.adjusted(-2, -2, 2, 2)
             self.update()
         else:
             super().mousePressEvent(event)
@@ -174,20 +243,53 @@ class ImageArea(QLabel):
         """Handle mouse move events"""
         if self.drawing:
             self.current_point = event.pos()
-            self.update()
+            # Build the normalized selection box from the integer drag start
+            x = self.current_point.x()
+            y = self.current_point.y()
+            self._drag_rect = QRect(
+                min(self._start_x, x),
+                min(self._start_y, y),
+                abs(x - self._start_x) + 1,
+                abs(y - self._start_y) + 1
+            )
+            # Repaint only the area covered by the previous and the new selection box,
+            # inflated by the pen width
+            new_rect = self._drag_rect.adjusted(-2, -2, 2, 2)
+            self.update(self._last_paint_rect.united(new_rect))
+            self._last_paint_rect = new_rect
 
     def mouseReleaseEvent(self, event):
         """Handle mouse release events"""
         if self.drawing and event.button() == Qt.MouseButton.LeftButton:
             self.drawing = False
-            box = QRect(self.start_point, self.current_point).normalized()
-            self._update_selection_box(box)
+            self._update_selection_box(self._drag_rect)
+            # Upgrade anything rescaled during the drag to smooth scaling
+            self._fit_image_to_screen()
+
+    def resizeEvent(self, event):
+        """Invalidate the cached image position when the label is resized"""
+        self._scaled_rect = None
+        super().resizeEvent(event)
 
     def paintEvent(self, event):
         """Override paint event to draw selection box"""
-        super().paintEvent(event)
-        self._draw_selection_box()
-        self._draw_face_box()
+        dirty_rect = event.rect()
+        scaled_rect = self._get_scaled_image_rect()
+        if (self._scaled_pixmap is not None and not self._scaled_pixmap.hasAlphaChannel()
+                and scaled_rect.contains(dirty_rect)):
+            # The dirty area is fully covered by the opaque image (e.g. while dragging a selection),
+            # so blit that part of the scaled pixmap instead of composing the whole styled label
+            painter = QPainter(self)
+            painter.drawPixmap(dirty_rect, self._scaled_pixmap, dirty_rect.translated(-scaled_rect.topLeft()))
+        else:
+            super().paintEvent(event)
+            painter = QPainter(self)
+        
+        # Draw both overlays in the same painter session, with antialiasing for smoother lines
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self._draw_selection_box(painter)
+        self._draw_face_box(painter)
+        painter.end()
 
     """ End: Overrriding methods"""
     
@@ -201,24 +303,59 @@ class ImageArea(QLabel):
         self.drawing = False
         self.update()
 
-    def load_image(self, source: str):
+    def load_image(self, source: str, image: Optional[QImage] = None, temporary: bool = False):
+        basename = os.path.basename(source)
         try:
-            # Load image using QImage first to handle ICC profile
-            image = QImage(source)
-            if image.isNull():
-                self._log_message(f"Error: Could not load image {source.split('/')[-1]}")
-                return
-                
-            # Convert to QPixmap
-            pixmap = QPixmap.fromImage(image)
+            if temporary:
+                # A pasted image has no file; source only names it
+                stat = None
+                image_key = (source, image.cacheKey())
+            else:
+                # Stat the file once per load; the result is kept for the file size shown by the caller
+                stat = os.stat(source)
+                # The size also tells apart files rewritten within the file system's timestamp resolution
+                image_key = (source, stat.st_mtime_ns, stat.st_size)
+            if image is None:
+                # Reuse the pixmap of a file loaded before, unless it was modified since
+                cache_key = f"{source}:{stat.st_mtime_ns}"
+                pixmap = QPixmapCache.find(cache_key)
+                if pixmap is not None:
+                    image = pixmap.toImage()
+                else:
+                    # Load image using QImage first to handle ICC profile
+                    image = QImage(source)
+                    if image.isNull():
+                        self._log_message(f"Error: Could not load image {basename}")
+                        return
+                    pixmap = QPixmap.fromImage(image)
+                    QPixmapCache.insert(cache_key, pixmap)
+            else:
+                # The caller already has the decoded image (e.g. from the clipboard)
+                if image.isNull():
+                    self._log_message(f"Error: Could not load image {basename}")
+                    return
+                pixmap = QPixmap.fromImage(image)
         except Exception as e:
             self._log_message(f"Error processing image: {str(e)}")
             return
 
 
+        if self._image_controller is None:
+            from controllers.image_controller import ImageController
+            self._image_controller = ImageController()
         self.image_pixmap = pixmap
-        self._display_pixmap = QPixmap(pixmap)  # Create a copy for display
+        self._display_pixmap = pixmap  # Shared with the original; overlays are drawn in paintEvent
+        self._image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+        # Color edits keep the alpha channel as it is, so edited images of an opaque file stay opaque
+        self._image_is_opaque = not image.hasAlphaChannel()
         self.image_source = source
+        self.image_basename = basename
+        self.image_stat = stat
+        self.image_is_temporary = temporary
+        self.image_is_edited = False
+        self.image_key = image_key
+        self._loaded_image_key = image_key
+        self._lighting_transfer_task = None
         self._fit_image_to_screen()
 
         # check image size
@@ -227,45 +364,81 @@ class ImageArea(QLabel):
 
         return self.image_pixmap
 
-    def copy_color_from_image(self, source_region: Tuple[int, int, int, int], source_image: QImage):
-        image = self.image_pixmap.toImage()
-        updated_image = self._image_controller.apply_region_lighting_transfer(
-            image, 
-            source_image,
-            source_region, 
-        )
+    def _set_edited_image(self, updated_image: QImage):
+        """Show an image with edited colors, giving it a key of its own so its faces are not
+        confused with those of the file"""
+        self.image_key = (self._loaded_image_key, next(_edit_generations))
+        self.image_is_edited = True
 
         # Update both the original and display pixmaps
-        qpixmap = QPixmap.fromImage(updated_image)
+        qpixmap = self._edited_image_pixmap(updated_image)
         self.image_pixmap = qpixmap
-        self._display_pixmap = QPixmap(qpixmap)
+        self._display_pixmap = qpixmap
+        self._image = updated_image
         self._fit_image_to_screen()
+
+    def _edited_image_pixmap(self, image: QImage) -> QPixmap:
+        """Build the pixmap of an edited RGBA image, without an alpha channel if the loaded file had none
+        so that paintEvent can still blit it directly"""
+        if self._image_is_opaque:
+            image = image.convertToFormat(QImage.Format.Format_RGBX8888)
+        return QPixmap.fromImage(image)
+
+    def get_image_copy(self) -> QImage:
+        """Get a shallow copy of the loaded RGBA image; it detaches if either side is modified, so another thread may read it"""
+        return QImage(self._image)
+
+    def copy_color_from_image(self, source_region: Tuple[int, int, int, int], source_image: QImage):
+        # Transfer on a worker thread so the UI stays responsive; the target is a shallow copy
+        # of the kept RGBA image, so the worker detaches its own buffer on first write
+        image = QImage(self._image)
+        task = _LightingTransferTask(self._image_controller, image, source_image, source_region)
+        task.signals.finished.connect(self._on_lighting_transfer_finished)
+        task.signals.failed.connect(self._on_lighting_transfer_failed)
+        self._lighting_transfer_task = task
+        QThreadPool.globalInstance().start(task)
+
+    def _on_lighting_transfer_finished(self, updated_image: QImage):
+        # Ignore results of a transfer that was superseded or whose image was replaced
+        task = self._lighting_transfer_task
+        if task is None or self.sender() is not task.signals:
+            return
+        self._lighting_transfer_task = None
+
+        self._set_edited_image(updated_image)
         
         # calculate stats again
         self._calculate_selection_stats()
 
+    def _on_lighting_transfer_failed(self, error: str):
+        task = self._lighting_transfer_task
+        if task is None or self.sender() is not task.signals:
+            return
+        self._lighting_transfer_task = None
+        self._log_message(f"Error during color copy: {error}")
     
-    def shift_to_color_stats(self, color_stats: RGBColorStats):
+    def shift_to_color_stats(self, color_stats: "RGBColorStats"):
         if not self.region_color_stats or not self.region:
             return
 
-        image = self.image_pixmap.toImage()
+        # The shift applies to the current image, so drop the result of a transfer still running on it
+        self._lighting_transfer_task = None
+
         updated_image = self._image_controller.apply_region_rgb_color_stats(
-            image, 
+            self._image, 
             self.region, 
             self.region_color_stats, 
             color_stats
         )
 
-        # Update both the original and display pixmaps
-        qpixmap = QPixmap.fromImage(updated_image)
-        self.image_pixmap = qpixmap
-        self._display_pixmap = QPixmap(qpixmap)
-        self._fit_image_to_screen()
+        self._set_edited_image(updated_image)
         
         # calculate stats again
         self._calculate_selection_stats()
 
     def update_face_location(self, face_location: tuple[int, int, int, int]):
+        # Repaint only if the box actually moved (e.g. not when a cached comparison is shown again)
+        if face_location == getattr(self, 'face_location', None):
+            return
         self.face_location = face_location
         self.update()
@@ -1,16 +1,36 @@
-from PyQt6.QtWidgets import QMainWindow, QWidget, QHBoxLayout
-from controllers.face_controller import FaceController
+from PyQt6.QtWidgets import QApplication, QMainWindow, QWidget, QHBoxLayout
 from controllers.log_controller import LogController
 from ui.views.right_view import RightView
 from ui.views.left_view import LeftView
+from ui.styles import APP_STYLE
 from injector import inject, singleton, Injector
-from PyQt6.QtCore import QRect
+from PyQt6.QtCore import QRect, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt6.QtGui import QPixmapCache
+
+class _FaceControllerWarmUpSignals(QObject):
+    failed = pyqtSignal(str)
+
+class _FaceControllerWarmUpTask(QRunnable):
+    """Import and create the face controller on a worker thread, emitting any error"""
+    def __init__(self, injector: Injector):
+        super().__init__()
+        self.signals = _FaceControllerWarmUpSignals()
+        self._injector = injector
+
+    def run(self):
+        try:
+            from controllers.face_controller import FaceController
+            self._injector.get(FaceController)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
 
 @singleton
 class MainWindow(QMainWindow):
     @inject
     def __init__(self, log_controller: LogController, injector: Injector):
         super().__init__()
+        self._injector = injector
+        self._log_controller = log_controller
         self.setWindowTitle("Face Comparison System")
         self.setMinimumSize(1400, 800)
         
@@ -23,6 +43,12 @@ class MainWindow(QMainWindow):
         y = (screen_geometry.height() - window_height) // 2
         self.setGeometry(QRect(x, y, window_width, window_height))
         
+        # Style all widgets from one application-wide stylesheet
+        QApplication.instance().setStyleSheet(APP_STYLE)
+        
+        # Allow enough pixmap cache (in KB) to keep several full-size photos decoded for reloads
+        QPixmapCache.setCacheLimit(64 * 1024)
+        
         # Create main widget and layout
         main_widget = QWidget()
         self.setCentralWidget(main_widget)
@@ -45,4 +71,18 @@ class MainWindow(QMainWindow):
         
         # Initialize system message area
         log_controller.log_message("System initialized and ready.")
+        
+        # Load the face models in the background once the window is up
+        QTimer.singleShot(0, self._warm_up_face_controller)
+
+    def _warm_up_face_controller(self):
+        """Import and create the face controller on a worker thread"""
+        task = _FaceControllerWarmUpTask(self._injector)
+        task.signals.failed.connect(self._on_face_controller_warm_up_failed)
+        # Keep the task (and its signals) alive until it is done
+        self._face_controller_warm_up_task = task
+        QThreadPool.globalInstance().start(task)
+
+    def _on_face_controller_warm_up_failed(self, error: str):
+        self._log_controller.log_message(f"Error loading face models: {error}")
     
\ No newline at end of file
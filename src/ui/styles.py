@@ -0,0 +1,38 @@
+# Application-wide stylesheet, parsed once by Qt; widgets opt in through their object name
+APP_STYLE = """
+    QPushButton#topBarButton {
+        background-color: #2196F3;
+        color: white;
+        border: none;
+        border-radius: 4px;
+        padding: 5px 10px;
+        font-size: 12px;
+        font-weight: 500;
+    }
+    QPushButton#topBarButton:hover {
+        background-color: #1976D2;
+    }
+    QPushButton#topBarButton:pressed {
+        background-color: #0D47A1;
+    }
+    QPushButton#topBarButton:disabled {
+        background-color: #BDBDBD;
+    }
+    QLabel#imageInfo {
+        background-color: #f0f0f0;
+        border: 1px solid #ddd;
+        padding: 5px;
+    }
+    QLabel#imageArea {
+        border: 2px dashed #aaa;
+        border-radius: 5px;
+        background-color: #f0f0f0;
+        padding: 10px;
+    }
+    QTextEdit#messageArea {
+        background-color: #ffffff;
+        border: 1px solid #ddd;
+        border-radius: 4px;
+        padding: 5px;
+    }
+"""
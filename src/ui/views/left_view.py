@@ -1,16 +1,54 @@
 from PyQt6.QtWidgets import QWidget, QHBoxLayout
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPixmap, QPainter, QPen
+from PyQt6.QtCore import QTimer, QObject, QRunnable, QThreadPool, pyqtSignal
+from PyQt6.QtGui import QImage
 from ui.blocks.image_drop_block import ImageDropBlock
-from controllers.face_controller import FaceController
 from controllers.log_controller import LogController
-from injector import inject
+from injector import inject, Injector
+from typing import TYPE_CHECKING, Hashable, Tuple
+
+if TYPE_CHECKING:
+    from controllers.face_controller import FaceMatchResult
+
+class _FaceComparisonSignals(QObject):
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+class _FaceComparisonTask(QRunnable):
+    """Run a face comparison of two already decoded images on a worker thread and emit the result"""
+    def __init__(self, injector: Injector, image1: QImage, image2: QImage,
+                 cache_keys: Tuple[Hashable, Hashable], persist: Tuple[bool, bool]):
+        super().__init__()
+        self.signals = _FaceComparisonSignals()
+        self._injector = injector
+        self._image1 = image1
+        self._image2 = image2
+        self._cache_keys = cache_keys
+        self._persist = persist
+
+    def run(self):
+        try:
+            # The face controller pulls in the ML stack, so it is imported and created on first use;
+            # if it is still being created by the startup warm-up this waits for it
+            from controllers.face_controller import FaceController
+            from controllers.image_controller import image_to_bgr_array
+            face_controller = self._injector.get(FaceController)
+            # Only images whose faces are not cached yet are converted
+            result = face_controller.compare_images(
+                lambda: image_to_bgr_array(self._image1),
+                lambda: image_to_bgr_array(self._image2),
+                self._cache_keys,
+                self._persist
+            )
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
 
 class LeftView(QWidget):
     @inject
-    def __init__(self, face_controller: FaceController, log_controller: LogController):
+    def __init__(self, injector: Injector, log_controller: LogController):
         super().__init__()
-        self._face_controller = face_controller
+        self._injector = injector
         self._log_controller = log_controller
         
         # Create layout
@@ -27,11 +65,26 @@ class LeftView(QWidget):
         # Connect signals to centralized event handler
         self.image_drop_block_1.block_event.connect(self._on_block_event)
         self.image_drop_block_2.block_event.connect(self._on_block_event)
+        
+        # Coalesce image loads arriving back to back (e.g. two files dropped at once) into one comparison
+        self._compare_timer = QTimer(self)
+        self._compare_timer.setSingleShot(True)
+        self._compare_timer.setInterval(150)
+        self._compare_timer.timeout.connect(self._on_check_and_compare)
+        
+        # Face comparison running in the background, and whether another one was requested meanwhile
+        self._face_comparison_task = None
+        self._face_comparison_pending = False
+        
+        # Image keys of both images for the running and the last finished comparison, and its result
+        self._face_comparison_key = None
+        self._last_face_comparison_key = None
+        self._last_face_comparison_result = None
 
     def _on_block_event(self, event_type: str, param: str):
         """Centralized event handler for all block events"""
         if event_type == "image_loaded":
-            self._on_check_and_compare()
+            self._compare_timer.start()
         elif event_type == "shift_color":
             self._on_shift_color(param)
         elif event_type == "copy_color":
@@ -45,13 +98,13 @@ class LeftView(QWidget):
             if self.image_drop_block_2.image_area.region:
                 self.image_drop_block_1.image_area.copy_color_from_image(
                     self.image_drop_block_2.image_area.region,
-                    self.image_drop_block_2.image_area.image_pixmap.toImage()
+                    self.image_drop_block_2.image_area.get_image_copy()
                 ) 
         else:
             if self.image_drop_block_1.image_area.region:
                 self.image_drop_block_2.image_area.copy_color_from_image(
                     self.image_drop_block_1.image_area.region,
-                    self.image_drop_block_1.image_area.image_pixmap.toImage()
+                    self.image_drop_block_1.image_area.get_image_copy()
                 ) 
 
     def _on_shift_color(self, target: str):
@@ -69,28 +122,71 @@ class LeftView(QWidget):
 
     def _on_check_and_compare(self):
         """Check if both images are loaded and perform comparison"""
-        if (self.image_drop_block_1.image_area.image_source and 
-            self.image_drop_block_2.image_area.image_source):
+        image_area_1 = self.image_drop_block_1.image_area
+        image_area_2 = self.image_drop_block_2.image_area
+        if image_area_1.image_source and image_area_2.image_source:
+            
+            # Run one comparison at a time; a request made meanwhile runs once the current one is done
+            if self._face_comparison_task is not None:
+                self._face_comparison_pending = True
+                return
+            
+            # The result is deterministic, so skip the comparison if both images are unchanged since the last one
+            comparison_key = (image_area_1.image_key, image_area_2.image_key)
+            if comparison_key == self._last_face_comparison_key:
+                self._log_controller.log_message(">>> Images unchanged, reusing the last face comparison")
+                self._show_face_comparison_result(self._last_face_comparison_result)
+                return
             
             self._log_controller.log_message(">>> Starting Face Comparison")
             
-            try:
-                # Perform face comparison using face_controller
-                result = self._face_controller.compare_images(
-                    self.image_drop_block_1.image_area.image_source,
-                    self.image_drop_block_2.image_area.image_source
+            # Perform face comparison using face_controller on a worker thread so the UI stays responsive,
+            # on the images already decoded for display instead of reading the files again
+            task = _FaceComparisonTask(
+                self._injector,
+                image_area_1.get_image_copy(),
+                image_area_2.get_image_copy(),
+                # An image unchanged since an earlier comparison reuses its detected faces and embedding
+                comparison_key,
+                # Pasted and color-edited images can't be found again in a later run, so their faces are not kept on disk
+                (
+                    not (image_area_1.image_is_temporary or image_area_1.image_is_edited),
+                    not (image_area_2.image_is_temporary or image_area_2.image_is_edited)
                 )
-                
-                # Log the results
-                self._log_controller.update_similarity_score(result.similarity_score)
-
-                # Draw face boxes on both images
-                self.image_drop_block_1.image_area.update_face_location(result.face1_location)
-                self.image_drop_block_2.image_area.update_face_location(result.face2_location)
-                
-                # Log the results
-                self._log_controller.log_message(f"- Similarity Score: {result.similarity_score:.2f}")
-                self._log_controller.log_message(f"- Processing Time: {result.processing_time:.2f} seconds\n")
-                                
-            except Exception as e:
-                self._log_controller.log_message(f"Error during face comparison: {str(e)}\n")
\ No newline at end of file
+            )
+            task.signals.finished.connect(self._on_face_comparison_finished)
+            task.signals.failed.connect(self._on_face_comparison_failed)
+            self._face_comparison_task = task
+            self._face_comparison_key = comparison_key
+            QThreadPool.globalInstance().start(task)
+
+    def _on_face_comparison_finished(self, result: "FaceMatchResult"):
+        self._last_face_comparison_key = self._face_comparison_key
+        self._last_face_comparison_result = result
+        # An image was replaced while comparing, so this result is already stale; the follow-up
+        # comparison shows the current one (reusing this result if the images turn out unchanged)
+        if not self._face_comparison_pending:
+            self._show_face_comparison_result(result)
+            self._log_controller.log_message(f"- Processing Time: {result.processing_time:.2f} seconds\n")
+        self._on_face_comparison_done()
+
+    def _show_face_comparison_result(self, result: "FaceMatchResult"):
+        # Log the results
+        self._log_controller.update_similarity_score(result.similarity_score)
+
+        # Draw face boxes on both images
+        self.image_drop_block_1.image_area.update_face_location(result.face1_location)
+        self.image_drop_block_2.image_area.update_face_location(result.face2_location)
+        
+        # Log the results
+        self._log_controller.log_message(f"- Similarity Score: {result.similarity_score:.2f}")
+
+    def _on_face_comparison_failed(self, error: str):
+        self._log_controller.log_message(f"Error during face comparison: {error}\n")
+        self._on_face_comparison_done()
+
+    def _on_face_comparison_done(self):
+        self._face_comparison_task = None
+        if self._face_comparison_pending:
+            self._face_comparison_pending = False
+            self._on_check_and_compare()
\ No newline at end of file
@@ -1,10 +1,21 @@
 from typing import Tuple
+from bisect import bisect_left
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QTextEdit
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer
 from controllers.log_controller import LogController
 from injector import inject
 
 class RightView(QWidget):
+    # Similarity levels based on InsightFace's typical thresholds: a score above the n-th
+    # threshold (and not above the next) falls into level n + 1
+    SIMILARITY_THRESHOLDS = (0.4, 0.5, 0.6)
+    SIMILARITY_LEVELS = (
+        ("#999999", " - Different persons"),
+        ("#E17F03", " - Some chance to be the same person"),
+        ("#E1DF06", " - Likely to be the same person"),
+        ("#87E169", " - Highly likely to be the same person"),
+    )
+
     @inject
     def __init__(self, log_controller: LogController):
         super().__init__()
@@ -29,12 +40,19 @@ class RightView(QWidget):
             }
         """
         
+        # Precompute the stylesheet for every similarity color, and remember which one is applied
+        self._style_by_color = {
+            color: self.style_template.replace("COLOR", color)
+            for color in ("#f8f8f8", *(color for color, _ in self.SIMILARITY_LEVELS))
+        }
+        self._similarity_color = "#f8f8f8"
+        
         # Add similarity result area (fixed height)
         self.similarity_result = QTextEdit()
         self.similarity_result.setReadOnly(True)
         self.similarity_result.setText("Similarity results will appear here...")
         self.similarity_result.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
-        self.similarity_result.setStyleSheet(self.style_template.replace("COLOR", "#f8f8f8"))
+        self.similarity_result.setStyleSheet(self._style_by_color[self._similarity_color])
         self.similarity_result.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
         # Calculate single line height using font metrics
@@ -47,34 +65,38 @@ class RightView(QWidget):
         self.message_area = QTextEdit()
         self.message_area.setReadOnly(True)
         self.message_area.setPlaceholderText("System messages will appear here...")
-        self.message_area.setStyleSheet("""
-            QTextEdit {
-                background-color: #ffffff;
-                border: 1px solid #ddd;
-                border-radius: 4px;
-                padding: 5px;
-            }
-        """)
+        self.message_area.setObjectName("messageArea")
         right_layout.addWidget(self.message_area)  # Stretch factor of 1 to fill remaining space
+        
+        # Messages logged in a burst are buffered and appended together, at most once per frame
+        self._log_buffer = []
+        self._log_flush_timer = QTimer(self)
+        self._log_flush_timer.setSingleShot(True)
+        self._log_flush_timer.setInterval(16)
+        self._log_flush_timer.timeout.connect(self._flush_log_messages)
 
     def _interpret_similarity(self, similarity: float) -> Tuple[str, str]:
         """Interpret the similarity score based on InsightFace's typical thresholds"""
-        if similarity > 0.6:
-            return "#87E169", f"{similarity:.2f} - Highly likely to bethe same person"
-        elif similarity > 0.5:
-            return "#E1DF06", f"{similarity:.2f} - Likely to be the same person"
-        elif similarity > 0.4:
-            return "#E17F03", f"{similarity:.2f} - Some chance to be the same person"
-        else:
-            return "#999999", f"{similarity:.2f} - Different persons"
+        color, description = self.SIMILARITY_LEVELS[bisect_left(self.SIMILARITY_THRESHOLDS, similarity)]
+        return color, f"{similarity:.2f}{description}"
 
     def log_message(self, message: str):
         """Add a message to the system message area"""
-        self.message_area.append(message)
+        self._log_buffer.append(message)
+        if not self._log_flush_timer.isActive():
+            self._log_flush_timer.start()
+
+    def _flush_log_messages(self):
+        """Append all buffered messages to the system message area in one go"""
+        self.message_area.append("\n".join(self._log_buffer))
+        self._log_buffer.clear()
 
     def update_similarity_result(self, similarity: float):
         """Update the similarity result display"""
         [color, message] = self._interpret_similarity(similarity)
-        self.similarity_result.setStyleSheet(self.style_template.replace("COLOR", color))
+        # Only restyle (and have Qt re-parse the stylesheet) when the color actually changes
+        if color != self._similarity_color:
+            self.similarity_result.setStyleSheet(self._style_by_color[color])
+            self._similarity_color = color
         self.similarity_result.setText(message)
         self.similarity_result.setAlignment(Qt.AlignmentFlag.AlignCenter)
\ No newline at end of file
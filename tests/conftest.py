@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app imports its modules relative to src/ (see run.bat), so the tests do the same
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
@@ -0,0 +1,154 @@
+import numpy as np
+import pytest
+from PyQt6.QtGui import QImage
+
+from controllers.image_controller import ImageController
+
+TILE_SIZE = 32
+OVERLAP = 16
+
+
+def _to_qimage(pixels: np.ndarray) -> QImage:
+    """Build an opaque RGBA8888 image owning a copy of (height, width, 3) RGB pixels"""
+    height, width, _ = pixels.shape
+    rgba = np.dstack([pixels, np.full((height, width), 255, dtype=np.uint8)])
+    rgba = np.ascontiguousarray(rgba)
+    return QImage(rgba.data, width, height, 4 * width, QImage.Format.Format_RGBA8888).copy()
+
+
+def _to_array(image: QImage) -> np.ndarray:
+    """Copy the RGB pixels of an image into a (height, width, 3) array"""
+    image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+    ptr = image.constBits()
+    ptr.setsize(image.sizeInBytes())
+    pixels = np.frombuffer(ptr, dtype=np.uint8).reshape(image.height(), image.bytesPerLine() // 4, 4)
+    return pixels[:, :image.width(), :3].copy()
+
+
+def _reference_stats(pixels: np.ndarray, region):
+    """Per-channel mean and SD of a region, using the two-pass math of the original per-pixel code"""
+    x1, y1, x2, y2 = region
+    values = pixels[y1:y2 + 1, x1:x2 + 1].reshape(-1, 3).astype(np.float64)
+    avg = values.sum(axis=0) / len(values)
+    sd = (((values - avg) ** 2).sum(axis=0) / len(values)) ** 0.5
+    return avg, sd
+
+
+def _reference_transform(value, curr_avg, curr_sd, target_avg, target_sd):
+    if curr_sd == 0:
+        return target_avg
+    return (value - curr_avg) * (target_sd / curr_sd) + target_avg
+
+
+def _reference_lighting_transfer(target: np.ndarray, reference: np.ndarray, region) -> np.ndarray:
+    """Tiled lighting transfer computed pixel by pixel, as the original implementation did"""
+    x1, y1, x2, y2 = region
+    result = target.copy()
+    width = x2 - x1 + 1
+    height = y2 - y1 + 1
+    weight_buffer = np.zeros((height, width), dtype=np.float32)
+    color_buffer = np.zeros((height, width, 3), dtype=np.float32)
+
+    for tile_y1 in range(y1, y2, OVERLAP):
+        for tile_x1 in range(x1, x2, OVERLAP):
+            tile_x2 = min(tile_x1 + TILE_SIZE - 1, x2)
+            tile_y2 = min(tile_y1 + TILE_SIZE - 1, y2)
+            effective_width = tile_x2 - tile_x1 + 1
+            effective_height = tile_y2 - tile_y1 + 1
+            tile_region = (tile_x1, tile_y1, tile_x2, tile_y2)
+            target_avg, target_sd = _reference_stats(target, tile_region)
+            ref_avg, ref_sd = _reference_stats(reference, tile_region)
+
+            for y in range(tile_y1, tile_y2 + 1):
+                for x in range(tile_x1, tile_x2 + 1):
+                    norm_dx = abs(x - (tile_x1 + effective_width / 2)) / (effective_width / 2)
+                    norm_dy = abs(y - (tile_y1 + effective_height / 2)) / (effective_height / 2)
+                    norm_dist = max(norm_dx, norm_dy)
+                    weight = 0 if norm_dist >= 1.0 else 0.5 * (1 + np.cos(norm_dist * np.pi))
+
+                    weight_buffer[y - y1, x - x1] += weight
+                    for c in range(3):
+                        new_value = _reference_transform(
+                            target[y, x, c], target_avg[c], target_sd[c], ref_avg[c], ref_sd[c]
+                        )
+                        color_buffer[y - y1, x - x1, c] += max(0, min(255, round(new_value))) * weight
+
+    for y in range(height):
+        for x in range(width):
+            if weight_buffer[y, x] > 0:
+                for c in range(3):
+                    result[y + y1, x + x1, c] = max(0, min(255, round(color_buffer[y, x, c] / weight_buffer[y, x])))
+    return result
+
+
+def _make_image(kind: str, height: int, width: int, seed: int) -> np.ndarray:
+    """Random, gradient or solid (height, width, 3) RGB pixels"""
+    rng = np.random.default_rng(seed)
+    if kind == "random":
+        return rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    if kind == "gradient":
+        ys, xs = np.mgrid[0:height, 0:width]
+        start = rng.integers(0, 128, 3)
+        return np.dstack([
+            start[0] + xs * 127 // (width - 1),
+            start[1] + ys * 127 // (height - 1),
+            start[2] + (xs + ys) * 127 // (width + height - 2),
+        ]).astype(np.uint8)
+    pixels = np.empty((height, width, 3), dtype=np.uint8)
+    pixels[:] = rng.integers(0, 256, 3)
+    return pixels
+
+
+def _assert_close(actual: np.ndarray, expected: np.ndarray):
+    """Allow a difference of 1 for float32 rounding"""
+    assert np.abs(actual.astype(np.int16) - expected.astype(np.int16)).max() <= 1
+
+
+def test_lighting_transfer_keeps_flat_target_tiles_flat():
+    """A solid target has an SD of exactly 0 in every tile, so each tile maps to the reference tile average"""
+    rng = np.random.default_rng(0)
+    controller = ImageController()
+    # 67 rows leave a 3 pixel high tile row at the bottom of the region
+    region = (1, 0, 62, 66)
+    for _ in range(10):
+        target = np.empty((67, 64, 3), dtype=np.uint8)
+        target[:] = rng.integers(0, 256, 3)
+        reference = rng.integers(0, 256, (67, 64, 3), dtype=np.uint8)
+
+        result = controller.apply_region_lighting_transfer(_to_qimage(target), _to_qimage(reference), region)
+
+        _assert_close(_to_array(result), _reference_lighting_transfer(target, reference, region))
+
+
+@pytest.mark.parametrize("kind", ["random", "gradient", "solid"])
+def test_region_stats_match_per_pixel_math(kind):
+    controller = ImageController()
+    pixels = _make_image(kind, 40, 50, seed=1)
+    # The region sticks out of the image on two sides, which the original code skipped pixel by pixel
+    region = (-5, 3, 44, 60)
+
+    stats = controller.calculate_region_rgb_color_stats(_to_qimage(pixels), region)
+
+    values = pixels[3:40, 0:45].reshape(-1, 3).astype(np.float64)
+    white = values.sum(axis=1) / 3
+    avg = values.mean(axis=0)
+    sd = np.sqrt(((values - avg) ** 2).mean(axis=0))
+    assert stats.pixel_count == len(values)
+    assert (stats.avg_r, stats.avg_g, stats.avg_b) == pytest.approx(tuple(avg), abs=1e-6)
+    assert (stats.r_sd, stats.g_sd, stats.b_sd) == pytest.approx(tuple(sd), abs=1e-6)
+    assert stats.avg_white == pytest.approx(white.mean(), abs=1e-6)
+    assert stats.white_sd == pytest.approx(np.sqrt(((white - white.mean()) ** 2).mean()), abs=1e-6)
+
+
+@pytest.mark.parametrize("target_kind", ["random", "gradient", "solid"])
+@pytest.mark.parametrize("reference_kind", ["random", "gradient", "solid"])
+def test_lighting_transfer_matches_per_pixel_math(target_kind, reference_kind):
+    controller = ImageController()
+    target = _make_image(target_kind, 70, 75, seed=2)
+    reference = _make_image(reference_kind, 70, 75, seed=3)
+    # Partial tiles on the right and at the bottom, and pixels outside the region left untouched
+    region = (4, 2, 71, 66)
+
+    result = controller.apply_region_lighting_transfer(_to_qimage(target), _to_qimage(reference), region)
+
+    _assert_close(_to_array(result), _reference_lighting_transfer(target, reference, region))